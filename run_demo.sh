@@ -3,4 +3,4 @@ echo "Syncing dependencies with uv..."
 uv sync
 
 echo "Running Carbon Oracle System..."
-uv run -m src.main
+uv run -m src.main --demo
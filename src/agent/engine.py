@@ -1,4 +1,5 @@
-from typing import List
+from collections import deque
+from typing import Deque
 from ..core.types import PredictionResult, ExtractedFeatures, AgentDecision
 from ..core.config_loader import config
 
@@ -8,7 +9,18 @@ class AgentEngine:
         self.target_capacity = config.get("min_thresholds.target_capacity", 3.0)
         self.require_confidence = config.get("agent.require_confidence", 0.6)
         
-        self.history_predictions: List[float] = []
+        # Only the last 3 predictions feed the trend check
+        self.history_predictions: Deque[float] = deque(maxlen=3)
+
+        # Decisions without per-call data are built once and reused
+        self._warmup_decision = AgentDecision(
+            action="continue",
+            reason="Warmup Phase (T < 60min). Monitoring..."
+        )
+        self._nominal_decision = AgentDecision(
+            action="continue",
+            reason="Process nominal. Monitoring..."
+        )
 
     def decide(self, prediction: PredictionResult, features: ExtractedFeatures, current_time: int = 0) -> AgentDecision:
         """
@@ -18,18 +30,19 @@ class AgentEngine:
         # 0. Warmup Period Protection
         # Don't stop early batches that are still heating up (e.g. < 60 mins)
         if current_time < 60:
-            return AgentDecision(
-                action="continue",
-                reason=f"Warmup Phase (T={current_time} < 60min). Monitoring..."
-            )
+            return self._warmup_decision
+
+        min_c = self.min_capacity
+        tgt_c = self.target_capacity
+        req_c = self.require_confidence
 
         self.history_predictions.append(prediction.capacity)
         
         # 1. Check Confidence
-        if prediction.confidence < self.require_confidence:
+        if prediction.confidence < req_c:
             return AgentDecision(
                 action="warn",
-                reason=f"Model confidence low ({prediction.confidence:.2f} < {self.require_confidence})"
+                reason=f"Model confidence low ({prediction.confidence:.2f} < {req_c})"
             )
             
         # 1.5 CONTROL LOOP: Check for Over-heating (Simple Logic)
@@ -43,28 +56,22 @@ class AgentEngine:
 
         # 2. Check Capacity Trend (Stop on Low Trend)
         # Trend is decreasing AND capacity < min_threshold
-        is_decreasing = False
-        if len(self.history_predictions) >= 3:
+        # (the trend is only inspected once capacity is already below threshold)
+        if prediction.capacity < min_c and len(self.history_predictions) == 3:
             # Simple check: last 3 are descending
-            last_3 = self.history_predictions[-3:]
-            if last_3[0] > last_3[1] > last_3[2]:
-                is_decreasing = True
-        
-        if prediction.capacity < self.min_capacity and is_decreasing:
-            return AgentDecision(
-                action="stop",
-                reason=f"Capacity {prediction.capacity:.2f} < {self.min_capacity} and trend is decreasing. Time to cut losses."
-            )
+            a, b, c = self.history_predictions
+            if a > b > c:
+                return AgentDecision(
+                    action="stop",
+                    reason=f"Capacity {prediction.capacity:.2f} < {min_c} and trend is decreasing. Time to cut losses."
+                )
 
         # 3. Check Success
-        if prediction.capacity >= self.target_capacity:
+        if prediction.capacity >= tgt_c:
             return AgentDecision(
                 action="stop",
-                reason=f"Target capacity {self.target_capacity} reached ({prediction.capacity:.2f}). Success!"
+                reason=f"Target capacity {tgt_c} reached ({prediction.capacity:.2f}). Success!"
             )
 
         # 4. Default
-        return AgentDecision(
-            action="continue",
-            reason="Process nominal. Monitoring..."
-        )
+        return self._nominal_decision
@@ -1,16 +1,27 @@
 from abc import ABC, abstractmethod
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Iterator
+import functools
+from typing import Iterator, Optional
 
-# Try importing openai, handle if missing
+# Prefer orjson for (de)serialization (works on bytes directly), fall back to stdlib json
 try:
-    from openai import OpenAI
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+    _JSONDecodeError = orjson.JSONDecodeError
 except ImportError:
-    OpenAI = None
+    _json_loads = json.loads
+    _json_dumps = lambda obj: json.dumps(obj).encode("utf-8")
+    _JSONDecodeError = json.JSONDecodeError
 
 from ..core.config_loader import config
 
+# OpenAI-style SSE framing, matched against raw stream bytes
+_DATA_PREFIX = b"data: "
+_DONE = b"[DONE]"
+
 class AIProvider(ABC):
     @abstractmethod
     def generate(self, prompt: str) -> str:
@@ -20,9 +31,16 @@ class AIProvider(ABC):
     def generate_stream(self, prompt: str) -> Iterator[str]:
         pass
 
+    def close(self):
+        """Release any pooled connections held by the provider."""
+        pass
+
 class OpenAIProvider(AIProvider):
     def __init__(self):
-        if not OpenAI:
+        # Imported lazily: the openai SDK is heavy and only needed for this backend
+        try:
+            from openai import OpenAI
+        except ImportError:
             raise ImportError("openai package not installed.")
         self.client = OpenAI(
             api_key=config.get("openai.api_key"),
@@ -52,61 +70,92 @@ class OllamaProvider(AIProvider):
         self.base_url = config.get("ollama.base_url")
         self.model = config.get("ollama.model")
 
+        # Keep-alive connection pool shared by every call on this provider
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate",
+            "Content-Type": "application/json"
+        })
+        # (connect, read) seconds; a stalled stream must not pin a pooled connection forever
+        self.timeout = (10.0, 300.0)
+
+        self.url = f"{self.base_url}/chat/completions"
+        # Static part of every request; only the messages change per call
+        self._payload_template = {"model": self.model}
+
+    def _encode_payload(self, prompt: str, stream: bool) -> bytes:
+        payload = dict(self._payload_template)
+        payload["messages"] = [{"role": "user", "content": prompt}]
+        payload["stream"] = stream
+        return _json_dumps(payload)
+
+    def close(self):
+        self.session.close()
+
     def generate(self, prompt: str) -> str:
-        # Re-use stream for simplicity or keep separate
-        full = ""
-        for chunk in self.generate_stream(prompt):
-            full += chunk
-        return full
+        try:
+            resp = self.session.post(self.url, data=self._encode_payload(prompt, stream=False), timeout=self.timeout)
+            if resp.status_code != 200:
+                return f"[Error: {resp.status_code}]"
+            data = _json_loads(resp.content)
+            # OpenAI compatible format
+            if "choices" in data and len(data["choices"]) > 0:
+                return data["choices"][0].get("message", {}).get("content", "") or ""
+            # Native Ollama format
+            return data.get("message", {}).get("content", "") or ""
+        except Exception as e:
+            return f"[Connection Error: {str(e)}]"
 
     def generate_stream(self, prompt: str) -> Iterator[str]:
-        url = f"{self.base_url}/chat/completions"
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": True # Enable streaming
-        }
         try:
-            with requests.post(url, json=payload, stream=True) as resp:
+            with self.session.post(self.url, data=self._encode_payload(prompt, stream=True), stream=True, timeout=self.timeout) as resp:
                 if resp.status_code == 200:
                     for line in resp.iter_lines():
                         if line:
-                            decoded = line.decode('utf-8')
-                            if decoded.strip() == "data: [DONE]": 
-                                break # OpenAI format done signal
-                            
                             # Handle "data: " prefix if present (OpenAI style)
-                            if decoded.startswith("data: "):
-                                decoded = decoded[6:]
-                                
+                            if line.startswith(_DATA_PREFIX):
+                                line = line[len(_DATA_PREFIX):]
+                            if line == _DONE:
+                                break # OpenAI format done signal
+
                             try:
-                                data = json.loads(decoded)
-                                # OpenAI compatible format
-                                if "choices" in data and len(data["choices"]) > 0:
-                                    delta = data["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content: 
-                                        yield content
-                                # Native Ollama format
-                                elif "message" in data:
-                                    content = data["message"].get("content", "")
-                                    if content: 
-                                        yield content
-                            except:
-                                pass # Ignore parsing errors in stream
+                                data = _json_loads(line)
+                            except _JSONDecodeError:
+                                continue # Ignore parsing errors in stream
+                            if not isinstance(data, dict):
+                                continue # e.g. a bare null or list: not a payload
+
+                            # OpenAI compatible format
+                            if "choices" in data and len(data["choices"]) > 0:
+                                delta = data["choices"][0].get("delta", {})
+                                content = delta.get("content", "")
+                                if content: 
+                                    yield content
+                            # Native Ollama format
+                            elif "message" in data:
+                                content = data["message"].get("content", "")
+                                if content: 
+                                    yield content
                 else:
                     yield f"[Error: {resp.status_code}]"
         except Exception as e:
             yield f"[Connection Error: {str(e)}]"
 
+@functools.lru_cache(maxsize=None)
+def _build_provider(provider_type: str) -> AIProvider:
+    # One provider (and its connection pool) per backend for the whole process
+    if provider_type == "openai":
+        return OpenAIProvider()
+    elif provider_type == "ollama":
+        return OllamaProvider()
+    else:
+        raise ValueError(f"Unknown AI provider: {provider_type}")
+
 class AIProviderFactory:
     @staticmethod
-    def get_provider() -> AIProvider:
-        provider_type = config.get("ai_provider", "ollama")
-        
-        if provider_type == "openai":
-            return OpenAIProvider()
-        elif provider_type == "ollama":
-            return OllamaProvider()
-        else:
-            raise ValueError(f"Unknown AI provider: {provider_type}")
+    def get_provider(provider_type: Optional[str] = None) -> AIProvider:
+        return _build_provider(provider_type or config.get("ai_provider", "ollama"))
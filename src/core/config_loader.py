@@ -1,18 +1,15 @@
 import toml
 import os
+import functools
 from typing import Any, Dict
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "config", "config.toml")
 
 class Config:
-    _instance = None
-    _config_data: Dict[str, Any] = {}
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Config, cls).__new__(cls)
-            cls._instance._load_config()
-        return cls._instance
+    def __init__(self):
+        self._config_data: Dict[str, Any] = {}
+        self._flat: Dict[str, Any] = {}
+        self._load_config()
 
     def _load_config(self):
         if not os.path.exists(CONFIG_PATH):
@@ -21,18 +18,23 @@ class Config:
         with open(CONFIG_PATH, "r") as f:
             self._config_data = toml.load(f)
 
+        # Resolve nested keys like "openai.model" once, so get() is a single lookup
+        self._flat = {}
+        self._flatten(self._config_data, "")
+
+    def _flatten(self, table: Dict[str, Any], prefix: str):
+        for k, v in table.items():
+            path = f"{prefix}{k}"
+            self._flat[path] = v
+            if isinstance(v, dict):
+                self._flatten(v, f"{path}.")
+
     def get(self, key: str, default: Any = None) -> Any:
-        # Support nested keys like "openai.model"
-        keys = key.split(".")
-        value = self._config_data
-        try:
-            for k in keys:
-                if value is None:
-                    return default
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        return self._flat.get(key, default)
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    return Config()
 
 # Global accessor
-config = Config()
+config = get_config()
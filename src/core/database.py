@@ -1,61 +1,114 @@
 import sqlite3
 import os
 import datetime
+import threading
+import weakref
+import numpy as np
 from typing import List, Tuple
 from .types import ExtractedFeatures
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "experiments.db")
 
+# Same string object on every call, so sqlite3 reuses the prepared statement
+INSERT_SQL = (
+    "INSERT INTO experiments ("
+    "batch_id, timestamp, ph_final, ph_slope, temp_mean, temp_std, "
+    "color_peak, weight_loss, ground_truth, pred_capacity"
+    ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+def _write_pending(conn: sqlite3.Connection, pending: List[tuple]):
+    # Caller must hold the instance lock
+    if not pending:
+        return
+    conn.execute("BEGIN")
+    conn.executemany(INSERT_SQL, pending)
+    conn.commit()
+    pending.clear()
+
+def _flush_rows(conn: sqlite3.Connection, lock: threading.Lock, pending: List[tuple]):
+    # Exit/GC hook: takes the connection state rather than the instance
+    with lock:
+        _write_pending(conn, pending)
+
 class ExperimentDatabase:
     def __init__(self):
         self.db_path = DB_PATH
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        # One connection per instance; the lock serialises access across threads
+        self._conn = sqlite3.connect(self.db_path, cached_statements=256, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
         self._init_db()
 
+        # Write-behind buffer: rows are committed in one transaction per flush. This only
+        # batches for bulk callers (imports, simulations saving many experiments); a caller
+        # saving one experiment per run should flush() right after save_experiment().
+        self._pending: List[tuple] = []
+        self._flush_every = 50
+        # Flushes leftovers at interpreter exit (or if the instance is garbage collected)
+        # without the exit hook keeping the instance alive
+        self._finalizer = weakref.finalize(self, _flush_rows, self._conn, self._lock, self._pending)
+
     def _init_db(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create table if not exists
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS experiments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                batch_id TEXT,
-                timestamp DATETIME,
-                ph_final REAL,
-                ph_slope REAL,
-                temp_mean REAL,
-                temp_std REAL,
-                color_peak REAL,
-                weight_loss REAL,
-                ground_truth REAL,
-                pred_capacity REAL
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        with self._lock:
+            cursor = self._conn.cursor()
+
+            # Create table if not exists
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS experiments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch_id TEXT,
+                    timestamp DATETIME,
+                    ph_final REAL,
+                    ph_slope REAL,
+                    temp_mean REAL,
+                    temp_std REAL,
+                    color_peak REAL,
+                    weight_loss REAL,
+                    ground_truth REAL,
+                    pred_capacity REAL
+                )
+            ''')
+            # Partial index backing the training-data filter
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_experiments_ground_truth
+                ON experiments(ground_truth) WHERE ground_truth > 0
+            ''')
+            self._conn.commit()
+
+    def _flush_pending(self):
+        # Caller must hold self._lock
+        _write_pending(self._conn, self._pending)
+
+    def flush(self):
+        """Writes every queued experiment to the database now."""
+        with self._lock:
+            self._flush_pending()
+
+    def close(self):
+        self._finalizer.detach()
+        with self._lock:
+            self._flush_pending()
+            self._conn.close()
 
     def get_total_experiments(self) -> int:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM experiments")
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
+            with self._lock:
+                self._flush_pending()
+                cursor = self._conn.cursor()
+                # AUTOINCREMENT keeps the last issued id here: O(1) instead of a table scan.
+                # Rows are never deleted, so it equals the row count.
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'experiments'")
+                row = cursor.fetchone()
+                return row[0] if row else 0
         except:
             return 0
 
     def save_experiment(self, batch_id: str, features: ExtractedFeatures, ground_truth: float, pred_capacity: float):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO experiments (
-                batch_id, timestamp, ph_final, ph_slope, temp_mean, temp_std, 
-                color_peak, weight_loss, ground_truth, pred_capacity
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        row = (
             batch_id,
             datetime.datetime.now(),
             features.ph_final,
@@ -66,36 +119,35 @@ class ExperimentDatabase:
             features.weight_loss,
             ground_truth,
             pred_capacity
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"[DB] Saved experiment {batch_id} to history.")
+        )
+        with self._lock:
+            self._pending.append(row)
+            flushed = len(self._pending) >= self._flush_every
+            if flushed:
+                self._flush_pending()
+        if flushed:
+            print(f"[DB] Saved experiment {batch_id} to history.")
+        else:
+            print(f"[DB] Queued experiment {batch_id} (written to history on the next flush).")
 
-    def get_training_data(self) -> Tuple[List[List[float]], List[float]]:
+    def get_training_data(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Returns (X, y) for model training
+        Returns (X, y) for model training as float64 arrays of shape (n, 6) and (n,)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT ph_final, ph_slope, temp_mean, temp_std, color_peak, weight_loss, ground_truth
-            FROM experiments
-            WHERE ground_truth > 0
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
-        
+        with self._lock:
+            self._flush_pending()
+            cursor = self._conn.cursor()
+
+            cursor.execute('''
+                SELECT ph_final, ph_slope, temp_mean, temp_std, color_peak, weight_loss, ground_truth
+                FROM experiments
+                WHERE ground_truth > 0
+            ''')
+            rows = cursor.fetchall()
+
         if not rows:
-            return [], []
-            
-        X = []
-        y = []
-        for row in rows:
-            # First 6 columns are features
-            X.append(list(row[0:6]))
-            # Last column is target
-            y.append(row[6])
-            
-        return X, y
+            return np.empty((0, 6)), np.empty((0,))
+
+        # First 6 columns are features, last column is target
+        arr = np.asarray(rows, dtype=np.float64)
+        return arr[:, :6], arr[:, 6]
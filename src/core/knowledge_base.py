@@ -1,9 +1,15 @@
 import os
 import sys
 import contextlib
-import chromadb
+import hashlib
+from collections import OrderedDict
+from typing import List
+
+# chromadb is imported on first KnowledgeBase construction (it pulls in onnxruntime)
+_chromadb = None
 
 KB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "knowledge_base")
+EMBED_CACHE_SIZE = 512
 
 @contextlib.contextmanager
 def suppress_stderr():
@@ -15,12 +21,47 @@ def suppress_stderr():
         finally:
             sys.stderr = old_stderr
 
+def _import_chromadb():
+    global _chromadb
+    if _chromadb is None:
+        import chromadb
+        import chromadb.utils.embedding_functions
+        _chromadb = chromadb
+    return _chromadb
+
 class KnowledgeBase:
     def __init__(self):
+        chromadb = _import_chromadb()
         # Persistent storage
         with suppress_stderr():
             self.client = chromadb.PersistentClient(path=KB_PATH)
             self.collection = self.client.get_or_create_collection(name="experiments_rag")
+            # Same embedder the collection uses by default, so cached vectors stay comparable
+            self._embedder = chromadb.utils.embedding_functions.DefaultEmbeddingFunction()
+        self._embed_cache: OrderedDict[str, List[float]] = OrderedDict()
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Embeds arbitrary text with the collection's embedding function (cached).
+        """
+        return self._embed_query(text)
+
+    def _embed_query(self, text: str) -> List[float]:
+        """
+        Embeds a query string, reusing the vector for previously seen texts (LRU).
+        """
+        key = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        emb = self._embed_cache.get(key)
+        if emb is not None:
+            self._embed_cache.move_to_end(key)
+            return emb
+
+        with suppress_stderr():
+            emb = self._embedder([text])[0]
+        self._embed_cache[key] = emb
+        if len(self._embed_cache) > EMBED_CACHE_SIZE:
+            self._embed_cache.popitem(last=False)
+        return emb
 
     def add_experiment_insight(self, batch_id: str, summary_text: str, result_quality: str):
         """
@@ -40,9 +81,10 @@ class KnowledgeBase:
         Retrieves context from past similar experiments to help the AI Advisor.
         """
         try:
+            emb = self._embed_query(current_conditions_text)
             with suppress_stderr():
                 results = self.collection.query(
-                    query_texts=[current_conditions_text],
+                    query_embeddings=[emb],
                     n_results=n_results
                 )
             
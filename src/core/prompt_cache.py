@@ -0,0 +1,80 @@
+import sqlite3
+import os
+import hashlib
+import threading
+import numpy as np
+from typing import Optional
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "prompt_cache.db")
+
+class PromptCache:
+    """
+    Persistent cache of AI report responses.
+    Tier 1: exact prompt hash. Tier 2 (opt-in): nearest cached prompt embedding within
+    the same quality bucket, if its cosine similarity reaches `similarity_threshold`.
+    Report prompts are mostly fixed template text, so tier 2 can match other batches;
+    it is disabled when `similarity_threshold` is None.
+    """
+    def __init__(self, similarity_threshold: Optional[float] = None):
+        self.db_path = CACHE_PATH
+        self.similarity_threshold = similarity_threshold
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS prompt_cache (
+                    key TEXT PRIMARY KEY,
+                    quality TEXT,
+                    response TEXT,
+                    embedding BLOB
+                )
+            ''')
+            self._conn.commit()
+
+    @staticmethod
+    def key(prompt: str) -> str:
+        return hashlib.sha1(prompt.encode()).hexdigest()
+
+    def get_exact(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM prompt_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def similarity_enabled(self) -> bool:
+        return self.similarity_threshold is not None
+
+    def get_similar(self, embedding: np.ndarray, quality: str) -> Optional[str]:
+        if not self.similarity_enabled:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT response, embedding FROM prompt_cache WHERE quality = ? AND embedding IS NOT NULL",
+                (quality,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        cached = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+        sims = cached @ query / (np.linalg.norm(cached, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(sims))
+        if sims[best] >= self.similarity_threshold:
+            return rows[best][0]
+        return None
+
+    def put(self, key: str, quality: str, response: str, embedding: Optional[np.ndarray] = None):
+        blob = np.asarray(embedding, dtype=np.float32).tobytes() if embedding is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache (key, quality, response, embedding) VALUES (?, ?, ?, ?)",
+                (key, quality, response, blob)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,5 +1,7 @@
+from dataclasses import dataclass
+import numpy as np
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 class SensorRecord(BaseModel):
     """
@@ -13,7 +15,63 @@ class SensorRecord(BaseModel):
     color_index: float = Field(..., ge=0, le=1, description="Color index (0-1)")
     weight_change: float = Field(..., description="Weight change in grams")
 
-class ExtractedFeatures(BaseModel):
+# Full SensorRecord layout as one contiguous NumPy record (field order of BatchBuffer.FIELDS);
+# a structured array of these is the bulk form of a batch, arr['ph'] being a zero-copy column view.
+# float32: sensor channels carry 3-4 significant digits, and time_min is exact far beyond a batch.
+SENSOR_DTYPE = np.float32
+RECORD_DTYPE = np.dtype([
+    ('time_min', SENSOR_DTYPE),
+    ('ph', SENSOR_DTYPE),
+    ('conductivity', SENSOR_DTYPE),
+    ('temperature', SENSOR_DTYPE),
+    ('color_index', SENSOR_DTYPE),
+    ('weight_change', SENSOR_DTYPE),
+])
+
+class BatchBuffer:
+    """
+    Structure-of-Arrays history of a batch: one preallocated float64 column per
+    SensorRecord field, filled up to `idx`. Grows by doubling when full.
+    """
+    FIELDS = ("time_min", "ph", "conductivity", "temperature", "color_index", "weight_change")
+
+    def __init__(self, capacity: int = 256):
+        self.idx = 0
+        self._data = np.empty((len(self.FIELDS), max(capacity, 1)), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.idx
+
+    def push(self, record: SensorRecord):
+        if self.idx == self._data.shape[1]:
+            grown = np.empty((self._data.shape[0], 2 * self._data.shape[1]), dtype=np.float64)
+            grown[:, :self.idx] = self._data
+            self._data = grown
+        self._data[:, self.idx] = (
+            record.time_min, record.ph, record.conductivity,
+            record.temperature, record.color_index, record.weight_change
+        )
+        self.idx += 1
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """Filled part of one column (a view, no copy), e.g. buffer["ph"]."""
+        return self._data[self.FIELDS.index(field), :self.idx]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self._data[i, :self.idx] for i, name in enumerate(self.FIELDS)}
+
+    def to_records(self) -> List[SensorRecord]:
+        """AoS view for display/reporting code that consumes SensorRecord lists."""
+        return [
+            SensorRecord(
+                time_min=int(row[0]), ph=row[1], conductivity=row[2],
+                temperature=row[3], color_index=row[4], weight_change=row[5]
+            )
+            for row in self._data[:, :self.idx].T.tolist()
+        ]
+
+@dataclass(slots=True, frozen=True)
+class ExtractedFeatures:
     """
     Features extracted from a window of sensor records.
     Section 5.2 in PRD.
@@ -25,15 +83,17 @@ class ExtractedFeatures(BaseModel):
     color_peak: float
     weight_loss: float
 
-class PredictionResult(BaseModel):
+@dataclass(slots=True, frozen=True)
+class PredictionResult:
     """
     Model prediction output.
     Section 6.2 in PRD.
     """
-    capacity: float = Field(..., description="Predicted CO2 capacity")
-    confidence: float = Field(..., ge=0, le=1, description="Prediction confidence")
+    capacity: float # Predicted CO2 capacity
+    confidence: float # Prediction confidence (0-1)
 
-class AgentDecision(BaseModel):
+@dataclass(slots=True, frozen=True)
+class AgentDecision:
     """
     Decision made by the Agent.
     Section 7.3 in PRD.
@@ -1,14 +1,113 @@
-from typing import List
+from typing import List, Optional, Tuple, Union
+from operator import attrgetter
 import numpy as np
-from ..core.types import SensorRecord, ExtractedFeatures
+from ..core.types import SensorRecord, ExtractedFeatures, BatchBuffer, RECORD_DTYPE
+
+# C-level accessor returning the RECORD_DTYPE tuple for one record
+_record_fields = attrgetter(*RECORD_DTYPE.names)
+
+# One row per window, as returned by FeatureExtractor.extract_windows
+FEATURE_FIELDS = np.dtype([
+    ('ph_final', 'f8'),
+    ('ph_slope', 'f8'),
+    ('temp_mean', 'f8'),
+    ('temp_std', 'f8'),
+    ('color_peak', 'f8'),
+    ('weight_loss', 'f8'),
+])
+
+def records_to_array(records: List[SensorRecord]) -> np.ndarray:
+    """
+    Packs records into a RECORD_DTYPE structured array in a single pass.
+    """
+    return np.fromiter(map(_record_fields, records), dtype=RECORD_DTYPE, count=len(records))
+
+def _column(arr, name: str) -> np.ndarray:
+    # Feature math runs in float64 whatever the column precision (RECORD_DTYPE is float32)
+    return np.asarray(arr[name], dtype=np.float64)
 
 class FeatureExtractor:
     """
     Extracts features from a sequence of sensor records.
+    Either in one shot (extract) or incrementally, record by record (update/finalize).
     """
-    
-    def extract(self, records: List[SensorRecord]) -> ExtractedFeatures:
-        if not records:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clears the running accumulators used by update()/finalize()."""
+        self._count = 0
+        self._ph_first = self._ph_last = 0.0
+        self._time_first = self._time_last = 0
+        self._temp_mean = 0.0
+        self._temp_m2 = 0.0 # Welford sum of squared deviations
+        self._color_peak = 0.0
+        self._weight_last = 0.0
+
+    def update(self, record: SensorRecord):
+        """Folds one record into the running accumulators in O(1)."""
+        self._count += 1
+        if self._count == 1:
+            self._ph_first = record.ph
+            self._time_first = record.time_min
+            self._color_peak = record.color_index
+        elif record.color_index > self._color_peak:
+            self._color_peak = record.color_index
+
+        self._ph_last = record.ph
+        self._time_last = record.time_min
+        self._weight_last = record.weight_change
+
+        delta = record.temperature - self._temp_mean
+        self._temp_mean += delta / self._count
+        self._temp_m2 += delta * (record.temperature - self._temp_mean)
+
+    def _running_features(self) -> Tuple[float, float, float, float, float, float]:
+        # (ph_final, ph_slope, temp_mean, temp_std, color_peak, weight_loss) from the accumulators
+        n = self._count
+        if not n:
+            return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        if n > 1:
+            ph_slope = (self._ph_last - self._ph_first) / (self._time_last - self._time_first + 1e-6)
+            temp_std = (self._temp_m2 / n) ** 0.5
+        else:
+            ph_slope = 0.0
+            temp_std = 0.0
+        return (self._ph_last, ph_slope, self._temp_mean, temp_std, self._color_peak, self._weight_last)
+
+    def finalize(self) -> ExtractedFeatures:
+        """
+        Features of every record passed to update() since the last reset(),
+        equivalent to extract() over the same records.
+        """
+        ph_final, ph_slope, temp_mean, temp_std, color_peak, weight_loss = self._running_features()
+        return ExtractedFeatures(
+            ph_final=ph_final,
+            ph_slope=ph_slope,
+            temp_mean=temp_mean,
+            temp_std=temp_std,
+            color_peak=color_peak,
+            weight_loss=weight_loss
+        )
+
+    def feature_vector(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Same features as finalize(), written straight into a (1, 6) float32 row
+        (the Predictor.predict_array input); `out` is reused when given.
+        """
+        if out is None:
+            out = np.empty((1, 6), dtype=np.float32)
+        out[0] = self._running_features()
+        return out
+
+    def extract(self, records: Union[List[SensorRecord], BatchBuffer, np.ndarray]) -> ExtractedFeatures:
+        """
+        Features of a whole record sequence: a SensorRecord list, a BatchBuffer, or a
+        RECORD_DTYPE structured array (records_to_array, SensorInterface.read_array).
+        """
+        if not len(records):
             # Return zero-filled features if no data
             return ExtractedFeatures(
                 ph_final=0.0,
@@ -19,37 +118,43 @@ class FeatureExtractor:
                 weight_loss=0.0
             )
 
+        # Single pass over the records into one structured array (SoA columns);
+        # a BatchBuffer or structured array already holds its columns
+        arr = records if isinstance(records, (BatchBuffer, np.ndarray)) else records_to_array(records)
+        ph = _column(arr, 'ph')
+        times = _column(arr, 'time_min')
+        temps = _column(arr, 'temperature')
+
         # 1. ph_final (using latest)
-        ph_final = records[-1].ph
-        
+        ph_final = float(ph[-1])
+
         # 2. ph_slope (simple linear regression over window or just start-end)
         # Using simple (end - start) / time or similar. 
         # Better: (last - first) / count if count > 1
         if len(records) > 1:
-            ph_slope = (records[-1].ph - records[0].ph) / (records[-1].time_min - records[0].time_min + 1e-6)
+            ph_slope = float((ph[-1] - ph[0]) / (times[-1] - times[0] + 1e-6))
         else:
             ph_slope = 0.0
 
         # 3. temp_mean
-        temps = [r.temperature for r in records]
-        temp_mean = float(np.mean(temps))
-        
-        # 4. temp_std
+        temp_mean = float(temps.mean())
+
+        # 4. temp_std (population std, reusing the mean instead of a second np.std pass)
         if len(records) > 1:
-            temp_std = float(np.std(temps))
+            dev = temps - temp_mean
+            temp_std = float(np.sqrt(np.dot(dev, dev) / len(dev)))
         else:
             temp_std = 0.0
 
         # 5. color_peak
-        colors = [r.color_index for r in records]
-        color_peak = max(colors)
+        color_peak = float(_column(arr, 'color_index').max())
 
         # 6. weight_loss (Total change so far)
         # weight_change is already "change", so we just take the last one relative to 0? 
         # PRD says "weight_change" field in record. 
         # If record.weight_change is cumulative (which mock generator implies: self.current_weight += ...), 
         # then we just take the last value.
-        weight_loss = records[-1].weight_change
+        weight_loss = float(_column(arr, 'weight_change')[-1])
 
         return ExtractedFeatures(
             ph_final=ph_final,
@@ -59,3 +164,31 @@ class FeatureExtractor:
             color_peak=color_peak,
             weight_loss=weight_loss
         )
+
+    def extract_windows(self, records_arr: np.ndarray, window: int, step: int = 1) -> np.ndarray:
+        """
+        Extracts features for every `window`-long slice of `records_arr` (a
+        RECORD_DTYPE array, see records_to_array), advancing by `step` records.
+        All windows are reduced at once on a strided view instead of calling
+        extract() per window. Returns a FEATURE_FIELDS array, one row per window.
+        """
+        if len(records_arr) < window:
+            return np.empty(0, dtype=FEATURE_FIELDS)
+
+        windows = np.lib.stride_tricks.sliding_window_view(records_arr, window, axis=0)[::step]
+        # Same float64 upcast as extract()
+        ph = _column(windows, 'ph')
+        times = _column(windows, 'time_min')
+        temps = _column(windows, 'temperature')
+
+        out = np.empty(len(windows), dtype=FEATURE_FIELDS)
+        out['ph_final'] = ph[:, -1]
+        if window > 1:
+            out['ph_slope'] = (ph[:, -1] - ph[:, 0]) / (times[:, -1] - times[:, 0] + 1e-6)
+        else:
+            out['ph_slope'] = 0.0
+        out['temp_mean'] = temps.mean(axis=-1)
+        out['temp_std'] = temps.std(axis=-1)
+        out['color_peak'] = windows['color_index'].max(axis=-1)
+        out['weight_loss'] = windows['weight_change'][:, -1]
+        return out
@@ -2,7 +2,11 @@ import time
 import sys
 import os
 import logging
-from typing import List
+import argparse
+import csv
+from contextlib import nullcontext
+
+import numpy as np
 
 # Rich Imports
 from rich.console import Console
@@ -18,7 +22,7 @@ from rich import box
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.core.config_loader import config
-from src.core.types import SensorRecord
+from src.core.types import BatchBuffer
 from src.mock.generator import MockSensorSystem
 from src.features.extract import FeatureExtractor
 from src.models.predictor import Predictor
@@ -68,13 +72,24 @@ def create_status_table():
     table.add_column("Agent Action", justify="center", style="bold")
     return table
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Carbon Oracle experiment monitor")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the AI provider (bypass the report cache)")
+    parser.add_argument("--headless", action="store_true", help="Skip the live dashboard and write prediction ticks to a CSV")
+    parser.add_argument("--demo", action="store_true", help="Add presentation delays during start-up")
+    parser.add_argument("--fast", action="store_true", help="Run the simulation without per-minute sleeps")
+    parser.add_argument("--archive-charts", action="store_true", help="Collect chart PNGs in reports/charts.zip instead of one file per batch")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     console.clear()
     console.print(create_header())
     
     # 1. Initialize System with Animation
     with console.status("[bold green]Initializing System Components...", spinner="dots") as status:
-        time.sleep(1.0) # Fake delay for effect
+        if args.demo and console.is_terminal:
+            time.sleep(1.0) # Fake delay for effect
         config.get("prediction_interval_min", 5) # access config to load it
         config_status = "[bold green]Config Loaded[/]"
         console.print(f"  ✓ {config_status}")
@@ -83,17 +98,16 @@ def main():
         
         sensor_system = MockSensorSystem()
         extractor = FeatureExtractor()
-        predictor = Predictor()
-        agent = AgentEngine()
         
-        # Database & Memory Loader
+        # Database & Memory Loader (one connection, shared with the predictor)
         db = ExperimentDatabase()
+        predictor = Predictor(db=db)
+        agent = AgentEngine()
         count = db.get_total_experiments()
         console.print(f"  ✓ Database Connected: [bold]{count}[/] experiments detected")
-        if count >= 5:
-             # Retrain model if we have enough data
-             console.print("  ✓ [bold magenta]Self-Correcting Model:[/] Retraining on persistent history...")
-             predictor.fit_on_history(db)
+        if predictor.history_rows:
+             # Predictor already retrained on the persistent history at construction
+             console.print(f"  ✓ [bold magenta]Self-Correcting Model:[/] Trained on {predictor.history_rows} historical experiments")
         
         # AI Provider
         llm = None
@@ -106,27 +120,44 @@ def main():
         
         # Initialize Analyst
         reports_dir = os.path.join(os.path.dirname(__file__), "..", "reports")
-        analyst = BatchAnalyst(ai_provider=llm, output_dir=reports_dir)
+        chart_archive = os.path.join(reports_dir, "charts.zip") if args.archive_charts else None
+        analyst = BatchAnalyst(ai_provider=llm, output_dir=reports_dir, use_cache=not args.no_cache,
+                               chart_archive=chart_archive)
         console.print("  ✓ System Ready")
 
     # 2. Start Batch
     batch_id = sensor_system.start_new_experiment()
     # MOVED: get_ground_truth call to end of experiment
+    # Chart worker starts up while the batch runs
+    analyst.visualizer.warm_up()
     
     console.print(Panel(f"Starting Experiment Batch: [bold yellow]{batch_id}[/]\nTarget: Adsorbent Activation", 
                        title="Experiment Control", border_style="green"))
 
 
-    history_records: List[SensorRecord] = []
+    # SoA history of the batch (allocated for the configured duration)
+    history = BatchBuffer(capacity=config.get("experiment_duration_min", 180) + 1)
     
-    # Live Dashboard Table
+    # Model input row, refilled in place on every prediction tick
+    feature_row = np.empty((1, 6), dtype=np.float32)
+
+    # Live Dashboard Table (only when someone is watching a terminal)
+    headless = args.headless or not console.is_terminal
     table = create_status_table()
+    csv_file = None
+    if headless:
+        os.makedirs(reports_dir, exist_ok=True)
+        csv_path = os.path.join(reports_dir, f"{batch_id}_ticks.csv")
+        csv_file = open(csv_path, "w", newline="")
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(["time_min", "ph", "temperature", "conductivity", "pred_capacity", "confidence", "action", "adjustment"])
+        console.print(f"Headless mode: writing ticks to {csv_path}")
 
     # 3. Time Loop with Live Display
     active = True
     logger.info(f"Starting Batch {batch_id}")
     
-    with Live(table, console=console, refresh_per_second=10) as live:
+    with (nullcontext() if headless else Live(table, console=console, refresh_per_second=4)):
         while active:
             # Read Sensor
             record = sensor_system.read()
@@ -135,15 +166,14 @@ def main():
                 logger.info("Batch duration completed normally.")
                 break
                 
-            history_records.append(record)
+            history.push(record)
+            extractor.update(record)
             
             # Periodic Prediction
             if record.time_min % prediction_interval == 0:
-                # Feature Eng
-                feats = extractor.extract(history_records)
-                
-                # Predict
-                prediction = predictor.predict(feats)
+                # Feature Eng (running aggregates, O(1) per tick) straight into the model input
+                prediction = predictor.predict_array(extractor.feature_vector(out=feature_row))
+                feats = extractor.finalize() # Agent rules read the named features
                 
                 # Agent Decide
                 decision = agent.decide(prediction, feats, current_time=record.time_min)
@@ -159,31 +189,47 @@ def main():
                 logger.info(f"T={record.time_min} | pH={record.ph:.2f} | Temp={record.temperature:.1f} | "
                             f"Cap={prediction.capacity:.2f} | Action={decision.action}")
 
-                # Style the Action
-                action_style = "green"
-                if decision.action == "warn": action_style = "yellow"
-                if decision.action == "stop": action_style = "bold red"
-                
-                # Add Row to Table
-                table.add_row(
-                    str(record.time_min),
-                    f"{record.ph:.2f}",
-                    f"{record.temperature:.1f}",
-                    f"{record.conductivity:.2f}",
-                    f"{prediction.capacity:.2f}",
-                    f"{prediction.confidence:.2f}",
-                    f"[{action_style}]{decision.action.upper()}[/{action_style}]{control_msg}"
-                )
+                if headless:
+                    csv_writer.writerow([
+                        record.time_min,
+                        f"{record.ph:.2f}",
+                        f"{record.temperature:.1f}",
+                        f"{record.conductivity:.2f}",
+                        f"{prediction.capacity:.2f}",
+                        f"{prediction.confidence:.2f}",
+                        decision.action,
+                        decision.adjustment or ""
+                    ])
+                else:
+                    # Style the Action
+                    action_style = "green"
+                    if decision.action == "warn": action_style = "yellow"
+                    if decision.action == "stop": action_style = "bold red"
+                    
+                    # Add Row to Table (drawn on the next Live refresh)
+                    table.add_row(
+                        str(record.time_min),
+                        f"{record.ph:.2f}",
+                        f"{record.temperature:.1f}",
+                        f"{record.conductivity:.2f}",
+                        f"{prediction.capacity:.2f}",
+                        f"{prediction.confidence:.2f}",
+                        f"[{action_style}]{decision.action.upper()}[/{action_style}]{control_msg}"
+                    )
                 
                 # Action Handling
                 if decision.action == "stop":
-                    live.console.print(Panel(f"[bold red]STOP SIGNAL TRIGGERED[/]\nReason: {decision.reason}", title="Agent Intervention", style="red"))
+                    console.print(Panel(f"[bold red]STOP SIGNAL TRIGGERED[/]\nReason: {decision.reason}", title="Agent Intervention", style="red"))
                     active = False
                 elif decision.action == "warn":
                     pass
 
             # Simulation Speed
-            time.sleep(0.02) 
+            if not args.fast:
+                time.sleep(0.02)
+
+    if csv_file:
+        csv_file.close()
 
     # 4. End of Experiment Report
     console.print("\n[bold cyan]Experiment Phase Completed.[/]")
@@ -191,19 +237,18 @@ def main():
     # Correctly retrieve Ground Truth AFTER experiment
     real_capacity_truth = sensor_system.get_ground_truth()
 
-    if history_records:
-        final_feats = extractor.extract(history_records)
+    if len(history):
+        final_feats = extractor.finalize()
         final_pred = predictor.predict(final_feats)
         
-        # 1. Charts
+        # 1. Charts (rendered in the background while the AI analysis runs)
         console.print("[bold cyan]Generating Visual Reports...[/]")
-        analyst.visualizer.generate_report_charts(batch_id, history_records)
-        console.print(f"[italic grey]Charts saved to: {analyst.visualizer.output_dir}[/]")
+        chart_job = analyst.visualizer.generate_report_charts(batch_id, history.columns())
 
         # 2. AI Analysis (Streaming)
         if analyst.ai:
             # Prepare Prompt
-            prompt = analyst.generate_report_prompt(batch_id, history_records, final_feats, final_pred, real_capacity_truth)
+            prompt = analyst.generate_report_prompt(batch_id, history, final_feats, final_pred, real_capacity_truth)
             
             console.print(Panel("[blink]Connecting to AI Agent...[/]", border_style="cyan"))
             
@@ -211,10 +256,16 @@ def main():
             with Live(Panel(Markdown(full_response), title="Real-time AI Assessment", border_style="cyan"), 
                       refresh_per_second=10, console=console) as live:
                 try:
-                    stream = analyst.ai.generate_stream(prompt)
+                    stream = analyst.stream_analysis(prompt, real_capacity_truth)
+                    # Re-parse the Markdown at most every 0.1 s or at a line break, not per token
+                    last_render = time.monotonic()
                     for chunk in stream:
                         full_response += chunk
-                        live.update(Panel(Markdown(full_response), title="Real-time AI Assessment", border_style="cyan"))
+                        now = time.monotonic()
+                        if now - last_render >= 0.1 or chunk.endswith("\n"):
+                            live.update(Panel(Markdown(full_response), title="Real-time AI Assessment", border_style="cyan"))
+                            last_render = now
+                    live.update(Panel(Markdown(full_response), title="Real-time AI Assessment", border_style="cyan"))
                 except Exception as e:
                     full_response += f"\n**Analysis Error**: {e}"
                     live.update(Panel(Markdown(full_response), title="Real-time AI Assessment", border_style="red"))
@@ -225,12 +276,21 @@ def main():
             console.print("[bold red]AI Provider not configured. Skipping qualitative analysis.[/]")
 
         # 5. Save to Knowledge Base (SQL DB for Training)
-        db = ExperimentDatabase()
         db.save_experiment(batch_id, final_feats, real_capacity_truth, final_pred.capacity)
+        # One experiment per run: commit it now, not at close(), so a later failure cannot lose it
+        db.flush()
         console.print(f"[bold green]✓[/] Experiment Data saved to Persistent Memory.")
 
+        chart_path = chart_job.result()
+        console.print(f"[italic grey]Charts saved to: {os.path.dirname(chart_path)}[/]")
+
     else:
         console.print("[bold red]No data collected.[/]")
 
+    if llm:
+        llm.close()
+    analyst.close()
+    db.close()
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,54 @@
-import random
 import math
 import numpy as np
-from typing import Optional
-from ..core.types import SensorRecord
+from typing import Dict, List, Optional
+from ..core.types import SensorRecord, RECORD_DTYPE, SENSOR_DTYPE
+from ..sensors.interface import SensorInterface
 from ..core.config_loader import config
 
+# Optional JIT for the sequential walks; runs as plain Python without numba
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
+
+@njit(cache=True, fastmath=True)
+def _temperature_walk(start_temp: float, targets: np.ndarray, ramp_noise: np.ndarray, fluct_noise: np.ndarray) -> np.ndarray:
+    """
+    PID-like approach to the per-minute heater target, then steady state fluctuation.
+    """
+    out = np.empty(targets.shape[0])
+    temp = start_temp
+    for i in range(targets.shape[0]):
+        if temp < targets[i]:
+            temp += 10.0 + ramp_noise[i]
+        else:
+            temp = targets[i] + fluct_noise[i]
+        out[i] = temp
+    return out
+
+@njit(cache=True, fastmath=True)
+def _clamped_walk(x0: float, steps: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """
+    Bounded random walk: x[i] = min(hi, max(lo, x[i-1] + steps[i])), both bounds per step.
+    """
+    out = np.empty(steps.shape[0])
+    x = x0
+    for i in range(steps.shape[0]):
+        x = min(hi, max(lo, x + steps[i]))
+        out[i] = x
+    return out
+
 class MockBatchGenerator:
     """
     Simulates a single experimental batch.
     """
-    def __init__(self, batch_id: str):
+    def __init__(self, batch_id: str, seed: Optional[int] = None):
         self.batch_id = batch_id
+        # Per-instance generator: no shared global state, reproducible given a seed
+        self.rng = np.random.default_rng(seed)
         self.duration = config.get("experiment_duration_min", 180)
         self.current_min = 0
         
@@ -18,43 +56,112 @@ class MockBatchGenerator:
         self.batch_type = self._determine_batch_type()
         
         # Initial States & Parameters
-        self.start_ph = random.uniform(13.0, 14.0)
+        self.start_ph = self.rng.uniform(13.0, 14.0)
         self.target_temp = 800.0  # Default target
         
         # Modifiers based on batch type
         if self.batch_type == "under_active":
-            self.target_temp = random.uniform(400, 600)
+            self.target_temp = self.rng.uniform(400, 600)
             self.ph_decay_rate = 0.5  # Slow decay
         elif self.batch_type == "over_active":
-            self.target_temp = random.uniform(850, 950)
+            self.target_temp = self.rng.uniform(850, 950)
             self.ph_decay_rate = 1.5  # Fast decay
         elif self.batch_type == "abnormal":
             self.target_temp = 800
-            self.ph_decay_rate = random.choice([0.1, 3.0]) 
+            self.ph_decay_rate = 0.1 if self.rng.random() < 0.5 else 3.0
         elif self.batch_type == "optimal":
             # Tuned for Success (Goal > 3.0 mmol/g)
             self.target_temp = 800.0 
             self.ph_decay_rate = 0.6 # Reduced from 1.2 to land near pH 8.0 (13.5 - 0.03*180 = ~8.1)
             self.start_ph = 13.5
         else: # Normal
-            self.target_temp = random.uniform(750, 850)
+            self.target_temp = self.rng.uniform(750, 850)
             self.ph_decay_rate = 1.0
 
-        # Dynamics (Initial State)
-        self.current_ph = self.start_ph
-        self.current_cond = 1.0
-        self.current_temp = 25.0  # Room temp start
-        self.current_color = 0.0
-        self.current_weight = 0.0
-        
-        # History for calculating final capacity
-        self.temp_history = []
-        self.ph_history = []
-        self.color_history = []
+        # Inject Chaos based on batch type
+        self.chaos_factor = 1.0
+        if self.batch_type == "abnormal": self.chaos_factor = 3.0
+        if self.batch_type == "optimal": self.chaos_factor = 0.2 # Very stable
+
+        # The whole 0..duration timeline is precomputed; step() only indexes into it
+        self._precompute_timeline()
+
+    def _precompute_timeline(self):
+        n = self.duration + 1
+        t = np.arange(n)
+        chaos = self.chaos_factor
+
+        # All per-minute noise is drawn up front
+        self._ph_noise = self.rng.normal(0, 0.05 * chaos, n)
+        self._ramp_noise = self.rng.normal(0, 2.0 * chaos, n)
+        self._fluct_noise = self.rng.normal(0, 5.0 * chaos, n)
+        self._color_noise = self.rng.normal(0, 0.01, n)
+        self._weight_noise = self.rng.normal(0, 0.001, n)
+
+        # pH: Decays linearly with random spikes
+        decay = 0.05 * self.ph_decay_rate
+        self._ph = _clamped_walk(self.start_ph, self._ph_noise - decay, 7.0, 14.0)
+
+        # Conductivity: Increases then stabilizes
+        # Correlated with temperature and ion release
+        sigmoid = 1 / (1 + np.exp(-(t - 30) / 10))
+        self._cond = 1.0 + (29.0 * sigmoid) + self.rng.normal(0, 0.5, n)
+
+        # Random adsorption event every 20 min
+        self._weight_events = np.where(t % 20 == 0, 0.01, 0.0)
+
+        self._temp = np.empty(n)
+        self._color = np.empty(n)
+        self._weight = np.empty(n)
+        self._simulate_from(0)
+
+    def _simulate_from(self, start: int):
+        """
+        (Re)computes the temperature-dependent channels from minute `start` on,
+        e.g. after the heater target changed.
+        """
+        n = self.duration + 1
+        if start >= n:
+            return
+
+        # Temperature: PID-like approach to target (sequential by nature)
+        targets = np.full(n - start, float(self.target_temp))
+        # Abnormal: Temperature drifts or fails
+        if self.batch_type == "abnormal":
+            targets[max(61 - start, 0):] = 400.0 # Heater failure simulation
+        start_temp = self._temp[start - 1] if start > 0 else 25.0  # Room temp start
+        self._temp[start:] = _temperature_walk(start_temp, targets, self._ramp_noise[start:], self._fluct_noise[start:])
+
+        temp_factor = self._temp[start:] / 800.0
+
+        # Color Index: 0 -> 1 as carbonization happens
+        # Correlated with Time and Temp
+        color0 = self._color[start - 1] if start > 0 else 0.0
+        color_steps = 0.006 * temp_factor + self._color_noise[start:]
+        self._color[start:] = _clamped_walk(color0, color_steps, 0.0, 1.0)
+
+        # Weight Change: mostly loss
+        weight0 = self._weight[start - 1] if start > 0 else 0.0
+        weight_steps = -0.003 * temp_factor + self._weight_events[start:] + self._weight_noise[start:]
+        self._weight[start:] = _clamped_walk(weight0, weight_steps, -0.5, 0.2)
+
+    # History for calculating final capacity: the emitted prefix of the timeline.
+    # adjust_target_temp() only rewrites minutes >= current_min, so these are stable views.
+    @property
+    def temp_history(self) -> np.ndarray:
+        return self._temp[:self.current_min]
+
+    @property
+    def ph_history(self) -> np.ndarray:
+        return self._ph[:self.current_min]
+
+    @property
+    def color_history(self) -> np.ndarray:
+        return self._color[:self.current_min]
 
     def _determine_batch_type(self) -> str:
         # Increase probability of interesting/bad batches for Demo purposes
-        r = random.random()
+        r = self.rng.random()
         if r < 0.60: return "optimal"       # 60% Optimal/Success Focus
         if r < 0.80: return "normal"        # 20% Normal (Variable)
         if r < 0.90: return "under_active"  # 10% Weak
@@ -65,80 +172,94 @@ class MockBatchGenerator:
         """ Control Interface for Agent """
         print(f"[MockHardware] Adjusting Heater Target: {self.target_temp:.1f} -> {new_temp:.1f}C")
         self.target_temp = new_temp
+        # Minutes already emitted are history; only the remaining timeline changes
+        self._simulate_from(self.current_min)
 
     def step(self) -> Optional[SensorRecord]:
-        if self.current_min > self.duration:
+        i = self.current_min
+        if i > self.duration:
             return None
-        
-        # Inject Chaos based on batch type
-        chaos_factor = 1.0
-        if self.batch_type == "abnormal": chaos_factor = 3.0
-        if self.batch_type == "optimal": chaos_factor = 0.2 # Very stable
-        
-        # 1. Update Physics/Chemistry
-        
-        # pH: Decays exponentially or linearly
-        decay = (0.05 * self.ph_decay_rate) 
-        # Add random spikes
-        noise = random.gauss(0, 0.05 * chaos_factor)
-        self.current_ph = min(14.0, max(7.0, self.current_ph - decay + noise))
-        
-        # Temperature: PID-like approach to target
-        target = self.target_temp
-        # Abnormal: Temperature drifts or fails
-        if self.batch_type == "abnormal" and self.current_min > 60:
-             target = 400 # Heater failure simulation
-             
-        if self.current_temp < target:
-            self.current_temp += (10.0 + random.gauss(0, 2.0 * chaos_factor))
-        else:
-            # Steady state fluctuation
-            self.current_temp = target + random.gauss(0, 5.0 * chaos_factor)
-            
-        # Conductivity: Increases then stabilizes
-        # Correlated with temperature and ion release
-        sigmoid = 1 / (1 + math.exp(-(self.current_min - 30)/10)) 
-        self.current_cond = 1.0 + (29.0 * sigmoid) + random.gauss(0, 0.5)
-
-        # Color Index: 0 -> 1 as carbonization happens
-        # Correlated with Time and Temp
-        temp_factor = (self.current_temp / 800.0)
-        self.current_color = min(1.0, self.current_color + (0.006 * temp_factor) + random.gauss(0, 0.01))
-        self.current_color = max(0.0, self.current_color)
-
-        # Weight Change: mostly loss
-        weight_step = -0.003 * temp_factor 
-        if self.current_min % 20 == 0: # Random adsorption event?
-            weight_step += 0.01 
-        self.current_weight = min(0.2, max(-0.5, self.current_weight + weight_step + random.gauss(0, 0.001)))
-
-        # Update History
-        self.temp_history.append(self.current_temp)
-        self.ph_history.append(self.current_ph)
-        self.color_history.append(self.current_color)
 
+        # Raw readings; rounding is left to the display layer
         record = SensorRecord(
-            time_min=self.current_min,
-            ph=round(self.current_ph, 2),
-            conductivity=round(self.current_cond, 2),
-            temperature=round(self.current_temp, 1),
-            color_index=round(self.current_color, 3),
-            weight_change=round(self.current_weight, 4)
+            time_min=i,
+            ph=float(self._ph[i]),
+            conductivity=float(self._cond[i]),
+            temperature=float(self._temp[i]),
+            color_index=float(self._color[i]),
+            weight_change=float(self._weight[i])
         )
         
         self.current_min += 1
         return record
 
+    def step_batch(self, n: int) -> List[SensorRecord]:
+        """
+        Emits up to `n` consecutive records at once, straight from the precomputed timeline.
+        """
+        start = self.current_min
+        stop = min(start + n, self.duration + 1)
+        if stop <= start:
+            return []
+
+        columns = zip(
+            range(start, stop),
+            self._ph[start:stop].tolist(),
+            self._cond[start:stop].tolist(),
+            self._temp[start:stop].tolist(),
+            self._color[start:stop].tolist(),
+            self._weight[start:stop].tolist(),
+        )
+        records = [
+            SensorRecord(time_min=i, ph=ph, conductivity=cond, temperature=temp,
+                         color_index=color, weight_change=weight)
+            for i, ph, cond, temp, color, weight in columns
+        ]
+        self.current_min = stop
+        return records
+
+    def step_columns(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Like step_batch(), but returns float32 columns keyed by BatchBuffer.FIELDS.
+        """
+        start = self.current_min
+        stop = max(min(start + n, self.duration + 1), start)
+        self.current_min = stop
+        return {
+            "time_min": np.arange(start, stop, dtype=SENSOR_DTYPE),
+            "ph": self._ph[start:stop].astype(SENSOR_DTYPE),
+            "conductivity": self._cond[start:stop].astype(SENSOR_DTYPE),
+            "temperature": self._temp[start:stop].astype(SENSOR_DTYPE),
+            "color_index": self._color[start:stop].astype(SENSOR_DTYPE),
+            "weight_change": self._weight[start:stop].astype(SENSOR_DTYPE),
+        }
+
+    def step_array(self, n: int) -> np.ndarray:
+        """
+        Like step_batch(), but fills one RECORD_DTYPE structured array.
+        """
+        start = self.current_min
+        stop = max(min(start + n, self.duration + 1), start)
+        arr = np.empty(stop - start, dtype=RECORD_DTYPE)
+        arr['time_min'] = np.arange(start, stop)
+        arr['ph'] = self._ph[start:stop]
+        arr['conductivity'] = self._cond[start:stop]
+        arr['temperature'] = self._temp[start:stop]
+        arr['color_index'] = self._color[start:stop]
+        arr['weight_change'] = self._weight[start:stop]
+        self.current_min = stop
+        return arr
+
     def calculate_ground_truth_capacity(self) -> float:
         """
         Section 4.4: 
         co2_capacity = f(pH_final, temperature_mean, color_index_peak) + bias + noise
         """
-        if not self.temp_history: return 0.0
+        if not self.current_min: return 0.0
         
         ph_final = self.ph_history[-1]
-        temp_mean = np.mean(self.temp_history)
-        color_index_peak = max(self.color_history)
+        temp_mean = self.temp_history.mean()
+        color_index_peak = self.color_history.max()
 
         # Ideal conditions: pH ~ 8-9, Temp ~ 800, Color ~ 0.8
         
@@ -163,10 +284,10 @@ class MockBatchGenerator:
         if self.batch_type == "abnormal": bias = -2.0
         if self.batch_type == "optimal": bias = 0.5 # Increased bias to ensure capacity > 3.0
 
-        capacity = score + bias + random.gauss(0, 0.1)
-        return max(0.1, round(capacity, 2))
+        capacity = score + bias + self.rng.normal(0, 0.1)
+        return max(0.1, round(float(capacity), 2))
 
-class MockSensorSystem:
+class MockSensorSystem(SensorInterface):
     def __init__(self):
         self.current_generator = None
         self.batch_count = 0
@@ -191,6 +312,21 @@ class MockSensorSystem:
             return None
         return self.current_generator.step()
 
+    def read_batch(self, n: int) -> List[SensorRecord]:
+        if not self.current_generator:
+            return []
+        return self.current_generator.step_batch(n)
+
+    def read_columns(self, n: int) -> Dict[str, np.ndarray]:
+        if not self.current_generator:
+            return super().read_columns(0)
+        return self.current_generator.step_columns(n)
+
+    def read_array(self, n: int) -> np.ndarray:
+        if not self.current_generator:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return self.current_generator.step_array(n)
+
     def get_ground_truth(self) -> float:
         if not self.current_generator: return 0.0
         return self.current_generator.calculate_ground_truth_capacity()
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+def _float32_floor(values: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 <= each float64 value. For float32 inputs x,
+    x <= t holds exactly when x <= _float32_floor(t), so splits are unchanged.
+    """
+    out = values.astype(np.float32)
+    over = out.astype(np.float64) > values
+    out[over] = np.nextafter(out[over], np.float32(-np.inf))
+    return out
+
+class CompiledForest:
+    """
+    Flattened, read-only copy of a fitted sklearn tree ensemble.
+    All trees share one set of node arrays and are traversed in lockstep with
+    vectorized NumPy steps (one step per tree level), so a prediction costs
+    ~max_depth array operations instead of one Python call per tree.
+    Node arrays are 32-bit; inputs are expected as float32.
+    """
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        trees = [est.tree_ for est in model.estimators_]
+        offsets = np.cumsum([0] + [t.node_count for t in trees])
+        n_nodes = int(offsets[-1])
+
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.full(n_nodes, np.inf)
+        left = np.empty(n_nodes, dtype=np.int32)
+        right = np.empty(n_nodes, dtype=np.int32)
+        value = np.empty(n_nodes)
+
+        for tree, off in zip(trees, offsets[:-1]):
+            nodes = np.arange(off, off + tree.node_count)
+            is_leaf = tree.children_left < 0
+            # Leaves point back at themselves, so finished trees idle while deeper ones descend
+            left[nodes] = np.where(is_leaf, nodes, tree.children_left + off)
+            right[nodes] = np.where(is_leaf, nodes, tree.children_right + off)
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+            value[nodes] = tree.value[:, 0, 0]
+
+        depth = max(t.max_depth for t in trees)
+        return cls(feature, _float32_floor(threshold), left, right, value, offsets[:-1].astype(np.int32), depth)
+
+    def save(self, path: str):
+        """
+        Writes the node arrays as one .npy file each under directory `path`.
+        The bundle is written to a sibling temporary directory and swapped in with
+        os.replace, so existing files are never truncated: processes that have the old
+        bundle mapped keep reading it, and a reader never mixes arrays from two models.
+        """
+        path = os.path.abspath(path)
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".rf_tmp_", dir=parent)
+        try:
+            # mkdtemp creates the directory owner-only; keep the bundle readable like np.save files
+            os.chmod(tmp, 0o755)
+            for name in ARRAYS:
+                np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+            np.save(os.path.join(tmp, "depth.npy"), np.array(self.depth))
+            old = None
+            if os.path.exists(path):
+                # A directory cannot be replaced while non-empty: move the old bundle aside first
+                old = tempfile.mkdtemp(prefix=".rf_old_", dir=parent)
+                os.replace(path, os.path.join(old, "bundle"))
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        """
+        Memory-maps a bundle written by save(): no per-node objects are built,
+        pages are read lazily and shared between processes.
+        """
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+        depth = int(np.load(os.path.join(path, "depth.npy")))
+        return cls(depth=depth, **arrays)
+
+    def predict_trees(self, X: np.ndarray) -> np.ndarray:
+        """
+        Per-tree predictions for X of shape (n, n_features); returns (n, n_trees).
+        Same split rule as sklearn: go left when x[feature] <= threshold.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
@@ -1,32 +1,65 @@
 import os
-import joblib
+from joblib import Parallel, delayed
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from ..core.types import ExtractedFeatures, PredictionResult
 from ..mock.generator import MockBatchGenerator
 from ..features.extract import FeatureExtractor
+from .forest import CompiledForest
 
 from ..core.database import ExperimentDatabase
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "rf_model.pkl")
+# Compiled forest bundle (directory of memory-mapped .npy node arrays)
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "rf_model")
+# Each synthetic batch takes a few ms; process start-up only pays off for large sweeps
+PARALLEL_MIN_BATCHES = 200
+
+def _simulate_one(i: int) -> Tuple[List[float], float]:
+    """
+    Runs one synthetic batch to completion and returns (feature_vector, ground_truth).
+    Module-level so joblib workers can pickle it.
+    """
+    gen = MockBatchGenerator(f"TRAIN_{i}", seed=i)
+    records = []
+    while True:
+        rec = gen.step()
+        if rec is None: break
+        records.append(rec)
+
+    feats = FeatureExtractor().extract(records)
+    ground_truth = gen.calculate_ground_truth_capacity()
+
+    feat_vector = [
+        feats.ph_final, feats.ph_slope, feats.temp_mean, 
+        feats.temp_std, feats.color_peak, feats.weight_loss
+    ]
+    return feat_vector, ground_truth
 
 class Predictor:
-    def __init__(self):
-        self.model = None
-        self.extractor = FeatureExtractor()
-        self.db = ExperimentDatabase()
+    def __init__(self, db: Optional[ExperimentDatabase] = None):
+        self.model = None  # sklearn estimator; only held after training in this process
+        self._forest = None
+        self.db = db if db is not None else ExperimentDatabase()
+        # Number of DB rows the current model was fitted on (0 = synthetic/loaded model)
+        self.history_rows = 0
         self._load_or_train_model()
 
+    def _set_model(self, model):
+        self.model = model
+        # Flattened node arrays, used directly by predict()
+        self._forest = CompiledForest.from_sklearn(model)
+
     def fit_on_history(self, db: ExperimentDatabase):
         """Public method to force retraining on specific DB history"""
         self.db = db
         X_hist, y_hist = self.db.get_training_data()
+        if len(X_hist) == self.history_rows:
+            return # Model already fitted on exactly this history
         if len(X_hist) > 0:
             print(f"[Model] Force retraining on {len(X_hist)} records from history...")
-            self._train_on_data(X_hist, y_hist)
-            # Save the updated model
-            joblib.dump(self.model, MODEL_PATH)
+            self._train_on_data(X_hist, y_hist) # also saves the model
+            self.history_rows = len(X_hist)
 
     def _load_or_train_model(self):
         # 1. Check if we have enough history to retrain/fine-tune
@@ -35,9 +68,10 @@ class Predictor:
         if len(X_hist) >= 5:
             print(f"[Model] Found {len(X_hist)} real experiments in DB. Retraining on Real Data...")
             self._train_on_data(X_hist, y_hist)
+            self.history_rows = len(X_hist)
         elif os.path.exists(MODEL_PATH):
             try:
-                self.model = joblib.load(MODEL_PATH)
+                self._forest = CompiledForest.load(MODEL_PATH)
                 print("Loaded existing model.")
             except:
                 print("Model load failed. Retraining bootstrap...")
@@ -50,38 +84,26 @@ class Predictor:
         # If small data, mix with some synthetic to avoid overfitting?
         # For PoC, just train on what we have + maybe some synthetic if very small.
         # Let's simple: If < 20 samples, add 20 synthetic samples.
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
         if len(X) < 20:
              print("[Model] Data scarce (<20), augmenting with synthetic data...")
              X_syn, y_syn = self._generate_synthetic_data(count=20)
-             X.extend(X_syn)
-             y.extend(y_syn)
+             X = np.vstack([X, X_syn])
+             y = np.concatenate([y, y_syn])
 
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.model.fit(X, y)
-        joblib.dump(self.model, MODEL_PATH)
+        model = RandomForestRegressor(n_estimators=100, random_state=42)
+        model.fit(X, y)
+        self._set_model(model)
+        self._forest.save(MODEL_PATH)
         print(f"Model retrained on {len(X)} samples and saved.")
 
     def _generate_synthetic_data(self, count=50) -> Tuple[List, List]:
-        X_train = []
-        y_train = []
-        for i in range(count):
-            gen = MockBatchGenerator(f"TRAIN_{i}")
-            records = []
-            while True:
-                rec = gen.step()
-                if rec is None: break
-                records.append(rec)
-            
-            feats = self.extractor.extract(records)
-            ground_truth = gen.calculate_ground_truth_capacity()
-            
-            feat_vector = [
-                feats.ph_final, feats.ph_slope, feats.temp_mean, 
-                feats.temp_std, feats.color_peak, feats.weight_loss
-            ]
-            X_train.append(feat_vector)
-            y_train.append(ground_truth)
-        return X_train, y_train
+        # Batches are independent, so large sweeps fan out across all cores
+        n_jobs = -1 if count >= PARALLEL_MIN_BATCHES else 1
+        results = Parallel(n_jobs=n_jobs, backend="loky")(delayed(_simulate_one)(i) for i in range(count))
+        X_train, y_train = zip(*results)
+        return list(X_train), list(y_train)
 
     def _train_bootstrap_model(self):
         """
@@ -93,22 +115,28 @@ class Predictor:
 
 
     def predict(self, features: ExtractedFeatures) -> PredictionResult:
-        if not self.model:
-            return PredictionResult(capacity=0.0, confidence=0.0)
-
-        # Prepare input
-        X = [[
+        # Prepare input (float32 C-contiguous row: the layout sklearn trees use internally)
+        X = np.array([[
             features.ph_final, features.ph_slope, features.temp_mean,
             features.temp_std, features.color_peak, features.weight_loss
-        ]]
-        
-        # Predict
-        pred_capacity = self.model.predict(X)[0]
+        ]], dtype=np.float32)
+        return self.predict_array(X)
+
+    def predict_array(self, X: np.ndarray) -> PredictionResult:
+        """
+        Predicts from a ready (1, 6) float32 feature row, e.g. FeatureExtractor.feature_vector().
+        """
+        if self._forest is None:
+            return PredictionResult(capacity=0.0, confidence=0.0)
+
+        # Per-tree predictions from the compiled forest (all trees in lockstep);
+        # the forest prediction is their mean
+        preds = self._forest.predict_trees(X)[0]
+        pred_capacity = preds.mean()
         
         # Estimate confidence (heuristic based on tree variance if available, or just dummy)
         # Using standard deviation of trees in forest
-        preds = [tree.predict(X)[0] for tree in self.model.estimators_]
-        std_dev = np.std(preds)
+        std_dev = preds.std()
         
         # Invert std_dev to get confidence (0-1). 
         # Assuming std_dev > 1.0 is bad.
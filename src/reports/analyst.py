@@ -1,41 +1,109 @@
-from typing import List, Optional
-from ..core.types import SensorRecord, ExtractedFeatures, PredictionResult
+from typing import Iterator, Optional
+from ..core.types import ExtractedFeatures, PredictionResult, BatchBuffer
+from ..core.config_loader import config
 from ..ai.provider import AIProvider
 from .visualizer import Visualizer
 from ..core.knowledge_base import KnowledgeBase
+from ..core.prompt_cache import PromptCache
 
 class BatchAnalyst:
-    def __init__(self, ai_provider: Optional[AIProvider], output_dir: str):
+    def __init__(self, ai_provider: Optional[AIProvider], output_dir: str, use_cache: bool = True,
+                 chart_archive: Optional[str] = None):
         self.ai = ai_provider
-        self.visualizer = Visualizer(output_dir)
+        self.visualizer = Visualizer(output_dir, archive_path=chart_archive)
         self.kb = KnowledgeBase()
+        # RAG context per (temp_bin, slope_bin); cleared whenever the KB changes
+        self._cases_cache = {}
+        self.cache = None
+        # True when the last stream_analysis() answer came from the cache
+        self.served_from_cache = False
+        if use_cache and config.get("report_cache.enabled", True):
+            threshold = None
+            if config.get("report_cache.near_match", False):
+                threshold = config.get("report_cache.similarity_threshold", 0.92)
+            self.cache = PromptCache(similarity_threshold=threshold)
+
+    @staticmethod
+    def _quality(real_capacity: float) -> str:
+        return "good" if real_capacity > 2.0 else "bad"
+
+    def stream_analysis(self, prompt: str, real_capacity: float) -> Iterator[str]:
+        """
+        Streams the AI assessment for `prompt`, served from the report cache when
+        an identical prompt (or, if near_match is enabled, a near-identical one in the
+        same quality bucket) was answered before. Fresh responses are cached once fully received.
+        """
+        self.served_from_cache = False
+        if not self.cache:
+            yield from self.ai.generate_stream(prompt)
+            return
+
+        key = PromptCache.key(prompt)
+        quality = self._quality(real_capacity)
+        cached = self.cache.get_exact(key)
+        embedding = None
+        if cached is None and self.cache.similarity_enabled:
+            try:
+                embedding = self.kb.embed(prompt)
+                cached = self.cache.get_similar(embedding, quality)
+            except Exception as e:
+                print(f"[Cache] Similarity lookup skipped: {e}")
+        if cached is not None:
+            print("[Cache] Serving cached AI assessment.")
+            self.served_from_cache = True
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self.ai.generate_stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+
+        response = "".join(chunks)
+        # Provider failures come back as "[Error: ...]" / "[Connection Error: ...]" chunks
+        if response and not response.startswith(("[Error", "[Connection Error")):
+            self.cache.put(key, quality, response, embedding)
+
+    def _similar_cases(self, feats: ExtractedFeatures) -> str:
+        temp_bin = round(feats.temp_mean, 0)
+        slope_bin = round(feats.ph_slope, 3)
+        key = (temp_bin, slope_bin)
+        cases = self._cases_cache.get(key)
+        if cases is None:
+            # The query is built from the bins, so every feature set in a bin retrieves the same context
+            query_context = f"Temp={temp_bin:.0f}C, pH_slope={slope_bin:.3f}"
+            cases = self.kb.find_similar_cases(query_context)
+            if not cases.startswith("Vector DB Error"):
+                self._cases_cache[key] = cases
+        return cases
 
     def generate_report_prompt(self, 
                              batch_id: str, 
-                             records: List[SensorRecord], 
+                             history: BatchBuffer, 
                              final_feats: ExtractedFeatures, 
                              final_pred: PredictionResult, 
                              real_capacity: float) -> str:
         
         # 1. Generate Visualizations first
-        self.visualizer.generate_report_charts(batch_id, records)
+        self.visualizer.generate_report_charts(batch_id, history.columns())
 
         # 2. Build RAG Prompt
         print("[Report] Retrieving Context from Vector DB...")
-        query_context = f"Temp={final_feats.temp_mean:.1f}C, pH_slope={final_feats.ph_slope:.4f}"
-        similar_cases = self.kb.find_similar_cases(query_context)
+        similar_cases = self._similar_cases(final_feats)
         
-        # Simple stats
-        ph_start = records[0].ph
-        ph_end = records[-1].ph
-        temp_max = max(r.temperature for r in records)
+        # Simple stats, straight from the buffer columns (no per-record objects)
+        ph = history["ph"]
+        ph_start = ph[0]
+        ph_end = ph[-1]
+        temp_max = history["temperature"].max()
+        duration = int(history["time_min"][-1])
         
         prompt = f"""
         Role: Expert Chemical Engineer.
         Task: Assess batch quality and Recommend parameters for NEXT batch.
         
         Current Batch: {batch_id}
-        - Duration: {records[-1].time_min} min
+        - Duration: {duration} min
         - pH: {ph_start:.2f} -> {ph_end:.2f}
         - Temp: Mean {final_feats.temp_mean:.1f}°C, Max {temp_max:.1f}°C
         - Pred Capacity: {final_pred.capacity:.2f} mmol/g (True: {real_capacity:.2f})
@@ -49,8 +117,19 @@ class BatchAnalyst:
         return prompt
 
     def save_analysis(self, batch_id: str, analysis_text: str, real_capacity: float):
-        quality = "good" if real_capacity > 2.0 else "bad"
+        # A cached answer was written for another batch (possibly with its figures): keep it out of the KB
+        if self.served_from_cache:
+            print(f"[Memory] Cached assessment not stored as an insight for {batch_id}.")
+            return
+        quality = self._quality(real_capacity)
         self.kb.add_experiment_insight(batch_id, analysis_text[:500], quality)
+        self._cases_cache.clear()
+
+    def close(self):
+        """Waits for pending charts and releases the render worker and the report cache."""
+        self.visualizer.close()
+        if self.cache:
+            self.cache.close()
 
     # Legacy wrapper if needed, or remove
     def generate_full_report(self, *args, **kwargs):
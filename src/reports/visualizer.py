@@ -1,55 +1,239 @@
 import os
+import io
+import time
+import multiprocessing
+import zipfile
+from operator import attrgetter
+from concurrent.futures import Future, ProcessPoolExecutor
+import matplotlib
+# Charts are only ever written to files: use the non-interactive backend
+matplotlib.use("Agg", force=True)
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pandas as pd
-from typing import List
-from ..core.types import SensorRecord
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+from ..core.types import SensorRecord, SENSOR_DTYPE
+
+# Above this many samples a batch is decimated before plotting: the 1800 px wide PNG
+# cannot show more, and Agg's cost grows with the number of line segments
+MAX_PLOT_POINTS = 3000
+
+def _plot_index(n: int) -> Optional[np.ndarray]:
+    """
+    Strided sample indices (always keeping the last sample) if n exceeds MAX_PLOT_POINTS.
+    """
+    if n <= MAX_PLOT_POINTS:
+        return None
+    stride = -(-n // MAX_PLOT_POINTS)
+    idx = np.arange(0, n, stride)
+    if idx[-1] != n - 1:
+        idx = np.append(idx, n - 1)
+    return idx
+
+# One C-level call per record yields the plotted fields as a tuple
+_chart_fields = attrgetter('time_min', 'ph', 'temperature', 'conductivity')
+
+class _ChartTemplate:
+    """
+    Chart template built once per process: axes, titles and labels are reused
+    for every batch, only the line data and the suptitle change.
+    """
+    def __init__(self):
+        # PNG encode buffer, reused for every batch: it keeps its high-water allocation, so later
+        # charts are encoded without regrowing it
+        self.png = io.BytesIO()
 
-class Visualizer:
-    def __init__(self, output_dir: str):
-        self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
         # Set academic style
         sns.set_theme(style="whitegrid", context="paper")
-        
-    def generate_report_charts(self, batch_id: str, records: List[SensorRecord]):
+
+        # 1. Main Process Variables (pH, Temp, Cond) on one axes with twin y-axes:
+        # a single x-axis, tick set and grid instead of three stacked subplots
+        self.fig, ax_ph = plt.subplots(figsize=(12, 6), layout="constrained")
+        ax_temp = ax_ph.twinx()
+        ax_cond = ax_ph.twinx()
+        ax_cond.spines.right.set_position(("axes", 1.08))
+        self.axes = (ax_ph, ax_temp, ax_cond)
+        self.suptitle = self.fig.suptitle("", fontsize=14, fontweight='bold')
+
+        # pH (left axis)
+        self.ph_line, = ax_ph.plot([], [], color='tab:blue', linewidth=2, label='pH')
+        ax_ph.set_ylabel('pH Level', color='tab:blue')
+        ax_ph.axhline(y=7.0, color='gray', linestyle='--', alpha=0.5)
+        ax_ph.set_xlabel('Time (min)')
+
+        # Temperature (right axis)
+        self.temp_line, = ax_temp.plot([], [], color='tab:red', linewidth=2, label='Temperature')
+        ax_temp.set_ylabel('Temperature (°C)', color='tab:red')
+        ax_temp.grid(False)
+
+        # Conductivity (offset right axis)
+        self.cond_line, = ax_cond.plot([], [], color='tab:green', linewidth=2, label='Conductivity')
+        ax_cond.set_ylabel('Cond. (mS/cm)', color='tab:green')
+        ax_cond.grid(False)
+
+        # Data lines are drawn straight into the raster (output is PNG anyway)
+        for line in (self.ph_line, self.temp_line, self.cond_line):
+            line.set_rasterized(True)
+
+        ax_ph.legend(handles=[self.ph_line, self.temp_line, self.cond_line], loc='center right', fontsize=9)
+        ax_ph.set_title('Acidity, Thermal Profile & Ion Release', loc='left', fontsize=10)
+
+    def render(self, batch_id: str, t: np.ndarray, ph: np.ndarray,
+               temp: np.ndarray, cond: np.ndarray) -> int:
         """
-        Generates a composite visualization of the experiment.
+        Encodes the chart into self.png (from offset 0) and returns the PNG size in bytes.
         """
-        if not records:
+        self.suptitle.set_text(f"Batch {batch_id}: Carbon Activation Process Profile")
+        self.ph_line.set_data(t, ph)
+        self.temp_line.set_data(t, temp)
+        self.cond_line.set_data(t, cond)
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+
+        # 150 dpi is plenty for an on-screen report; fast zlib level for the PNG encode.
+        # Encoded in memory, the caller writes it out in one go.
+        self.png.seek(0)
+        self.fig.savefig(self.png, format="png", dpi=150, pil_kwargs={"compress_level": 1})
+        return self.png.tell()
+
+def _archive_write(archive_path: str, name: str, data: memoryview):
+    """
+    Adds `name` to the zip at `archive_path`; an existing member of that name is replaced
+    by rewriting the archive (zipfile cannot remove members in place).
+    """
+    # Stored (PNG is already compressed); closed per call so the archive is always valid
+    with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_STORED) as zf:
+        if name not in zf.NameToInfo:
+            zf.writestr(name, data)
             return
+        tmp_path = archive_path + ".tmp"
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED) as out:
+            for info in zf.infolist():
+                if info.filename != name:
+                    out.writestr(info, zf.read(info))
+            out.writestr(name, data)
+    os.replace(tmp_path, archive_path)
+
+def _write_file(path: str, data: memoryview):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+# Per-process template, created lazily inside the render worker
+_template: Optional[_ChartTemplate] = None
 
-        # Convert to DataFrame for easier plotting
-        data = [r.model_dump() for r in records]
-        df = pd.DataFrame(data)
+def _get_template() -> _ChartTemplate:
+    global _template
+    if _template is None:
+        _template = _ChartTemplate()
+    return _template
+
+def _warm_up():
+    # Imports matplotlib and builds the template while the batch is still running
+    _get_template()
+
+def _render_charts(save_path: str, archive: Optional[Tuple[str, str]], batch_id: str, t: np.ndarray,
+                   ph: np.ndarray, temp: np.ndarray, cond: np.ndarray) -> str:
+    """
+    Worker entry point (module-level so it can be pickled).
+    Writes the chart to `save_path`, or if `archive` is given as (zip path, member name)
+    into that zip.
+    """
+    template = _get_template()
+    size = template.render(batch_id, t, ph, temp, cond)
+    # Zero-copy view of this chart's bytes; released before the buffer is reused
+    with template.png.getbuffer() as view, view[:size] as png:
+        if archive:
+            save_path, member = archive
+            _archive_write(save_path, member, png)
+        else:
+            _write_file(save_path, png)
+    print(f"[Report] Saved process charts to {save_path}")
+    return save_path
+
+class Visualizer:
+    """
+    Renders batch charts in one background process, so the sensor loop never waits on matplotlib.
+    The worker is spawned (not forked: the parent may hold sqlite/rich threads) on first use and
+    re-imports the caller's main module, so scripts using Visualizer (or BatchAnalyst) need an
+    `if __name__ == "__main__":` guard.
+    """
+    def __init__(self, output_dir: str, archive_path: Optional[str] = None):
+        self.output_dir = output_dir
+        # Optional single zip collecting every batch chart instead of one PNG file per batch
+        self.archive_path = archive_path
+        # Batch ids restart at BATCH_001 every run: archive members are grouped per run
+        self.run_id = time.strftime("%Y%m%d_%H%M%S")
+        os.makedirs(output_dir, exist_ok=True)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (batch_id, n_records, last time_min) -> render job, so an unchanged batch is drawn once
+        self._done: Dict[Tuple[str, int, int], Future] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def warm_up(self):
+        """
+        Starts the render worker and builds the chart template ahead of the first chart,
+        e.g. while a batch is still running.
+        """
+        self._get_executor().submit(_warm_up)
+
+    def generate_report_charts(self, batch_id: str,
+                               records: Union[List[SensorRecord], Dict[str, np.ndarray], np.ndarray]) -> Optional[Future]:
+        """
+        Generates a composite visualization of the experiment in the background.
+        `records` is a SensorRecord list, a column dict (SensorInterface.read_columns,
+        BatchBuffer.columns) or a RECORD_DTYPE array (SensorInterface.read_array).
+        Returns a Future resolving to the saved chart path (None if there is no data).
+        """
+        columnar = isinstance(records, (dict, np.ndarray))
+        if columnar:
+            t = records['time_min']
+            n = len(t)
+            last_time = int(t[-1]) if n else None
+        else:
+            n = len(records)
+            last_time = records[-1].time_min if n else None
+        if not n:
+            return None
+
+        key = (batch_id, n, last_time)
+        job = self._done.get(key)
+        if job is not None and (not job.done() or (job.exception() is None and os.path.exists(job.result()))):
+            return job
+
+        # Plain NumPy columns; seaborn is only used for styling
+        idx = _plot_index(n)
+        if columnar:
+            # No-op for float32 sensor columns; narrows float64 ones (e.g. BatchBuffer) once
+            names = ('time_min', 'ph', 'temperature', 'conductivity')
+            t, ph, temp, cond = (np.asarray(records[name] if idx is None else records[name][idx], dtype=SENSOR_DTYPE)
+                                 for name in names)
+        else:
+            if idx is not None:
+                records = [records[i] for i in idx.tolist()]
+            t, ph, temp, cond = np.array(list(map(_chart_fields, records)), dtype=SENSOR_DTYPE).T
 
         # 1. Main Process Variables (pH, Temp, Cond)
-        fig, axes = plt.subplots(3, 1, figsize=(10, 12), sharex=True)
-        fig.suptitle(f"Batch {batch_id}: Carbon Activation Process Profile", fontsize=14, fontweight='bold')
-
-        # pH Plot
-        sns.lineplot(data=df, x='time_min', y='ph', ax=axes[0], color='tab:blue', linewidth=2)
-        axes[0].set_ylabel('pH Level')
-        axes[0].set_title('Acidity Evolution (pH)', loc='left', fontsize=10)
-        axes[0].axhline(y=7.0, color='gray', linestyle='--', alpha=0.5)
-
-        # Temperature Plot
-        sns.lineplot(data=df, x='time_min', y='temperature', ax=axes[1], color='tab:red', linewidth=2)
-        axes[1].set_ylabel('Temperature (°C)')
-        axes[1].set_title('Thermal Profile', loc='left', fontsize=10)
-        
-        # Conductivity Plot
-        sns.lineplot(data=df, x='time_min', y='conductivity', ax=axes[2], color='tab:green', linewidth=2)
-        axes[2].set_ylabel('Cond. (mS/cm)')
-        axes[2].set_xlabel('Time (min)')
-        axes[2].set_title('Conductivity & Ion Release', loc='left', fontsize=10)
-
-        plt.tight_layout()
         save_path = os.path.join(self.output_dir, f"{batch_id}_process_chart.png")
-        plt.savefig(save_path, dpi=300)
-        plt.close()
-        print(f"[Report] Saved process charts to {save_path}")
-
         # 2. Correlation Visual check (Color vs Weight) if needed
         # Just creating one main report chart for now.
-        return save_path
+        archive = None
+        if self.archive_path:
+            archive = (self.archive_path, f"{self.run_id}/{os.path.basename(save_path)}")
+        job = self._get_executor().submit(_render_charts, save_path, archive, batch_id, t, ph, temp, cond)
+        self._done[key] = job
+        return job
+
+    def close(self):
+        """Waits for pending charts and stops the render worker (if it was started)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,15 +1,55 @@
-from abc import ABC, abstractmethod
-from ..core.types import SensorRecord
+from typing import Dict, List, Protocol
+import numpy as np
+from ..core.types import SensorRecord, BatchBuffer, RECORD_DTYPE, SENSOR_DTYPE
 
-class SensorInterface(ABC):
+class SensorInterface(Protocol):
     """
-    Abstract base class for all sensors (Mock or Real).
+    Structural interface for all sensors (Mock or Real).
     Section 9.1 in PRD.
+    Every method below is a protocol member: a class conforms structurally only if it
+    implements read(), read_batch(), read_columns() and read_array(). A backend that only
+    provides read() should subclass SensorInterface explicitly to inherit the batched
+    defaults (and the Protocol metaclass, which derives from ABCMeta).
     """
     
-    @abstractmethod
     def read(self) -> SensorRecord:
         """
         Read the latest sensor data.
         """
-        pass
+        ...
+
+    def read_batch(self, n: int) -> List[SensorRecord]:
+        """
+        Read up to `n` consecutive samples in one call (fewer if the source runs dry).
+        Backends with a burst/bulk read should override this.
+        """
+        records = []
+        for _ in range(n):
+            record = self.read()
+            if record is None:
+                break
+            records.append(record)
+        return records
+
+    def read_columns(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Read up to `n` samples as float32 columns keyed by SensorRecord field
+        (BatchBuffer.FIELDS), with no per-sample objects on capable backends.
+        The default packs read_batch().
+        """
+        records = self.read_batch(n)
+        buffer = BatchBuffer(capacity=len(records))
+        for record in records:
+            buffer.push(record)
+        return {name: col.astype(SENSOR_DTYPE) for name, col in buffer.columns().items()}
+
+    def read_array(self, n: int) -> np.ndarray:
+        """
+        Read up to `n` samples into one RECORD_DTYPE structured array.
+        The default packs read_columns().
+        """
+        columns = self.read_columns(n)
+        arr = np.empty(len(columns["time_min"]), dtype=RECORD_DTYPE)
+        for name in RECORD_DTYPE.names:
+            arr[name] = columns[name]
+        return arr